@@ -14,8 +14,19 @@ from jax import jit
 from crazy_rl.utils.jax_spaces import Space
 
 
+def _upcast(locations: jnp.ndarray) -> jnp.ndarray:
+    # locations stored with a lower precision (e.g. bfloat16) are upcast to float32, float32 and float64 are kept
+    return locations.astype(jnp.promote_types(locations.dtype, jnp.float32))
+
+
 def _distances_to_target(agents_locations: jnp.ndarray, targets_locations: jnp.ndarray) -> jnp.ndarray:
-    return jnp.linalg.norm(agents_locations - targets_locations, axis=1)
+    return jnp.linalg.norm(_upcast(agents_locations) - _upcast(targets_locations), axis=1)
+
+
+def _pairwise_distances(agents_locations: jnp.ndarray) -> jnp.ndarray:
+    """Returns the (N, N) matrix of the euclidean distances between each pair of agents, in at least float32."""
+    agents_locations = _upcast(agents_locations)
+    return jnp.linalg.norm(agents_locations[:, None, :] - agents_locations[None, :, :], axis=-1)
 
 
 @jdc.pytree_dataclass
@@ -1,5 +1,5 @@
 """Escort environment for Crazyflie 2. Each agent is supposed to learn to surround a common target point moving to one point to another."""
-
+import time
 from functools import partial
 from typing import Tuple
 from typing_extensions import override
@@ -14,6 +14,7 @@ from crazy_rl.multi_agent.jax.base_parallel_env import (
     BaseParallelEnv,
     State,
     _distances_to_target,
+    _pairwise_distances,
 )
 from crazy_rl.utils.jax_spaces import Box, Space
 from crazy_rl.utils.jax_wrappers import AutoReset, VecEnv
@@ -42,6 +43,7 @@ class Escort(BaseParallelEnv):
         num_intermediate_points: int = 20,
         multi_obj: bool = False,
         size: int = 2,
+        dtype: jnp.dtype = jnp.float32,
     ):
         """Escort environment for Crazyflies 2.
 
@@ -53,26 +55,36 @@ class Escort(BaseParallelEnv):
             num_intermediate_points: Number of intermediate points in the target trajectory
             multi_obj: Whether to return a multi-objective reward
             size: Size of the map in meters
+            dtype: Floating point type used to store the locations of the drones and the target, e.g. jnp.bfloat16 halves
+                the memory traffic of large vectorized rollouts. Distances and rewards are always computed in float32
         """
         self.num_drones = num_drones
 
-        self._target_location = init_target_location  # unique target location for all agents
+        self.dtype = dtype
+        self._target_location = init_target_location.astype(dtype)  # unique target location for all agents
 
-        self._init_flying_pos = init_flying_pos
+        self._init_flying_pos = init_flying_pos.astype(dtype)
         self.multi_obj = multi_obj
         # There are two more ref points than intermediate points, one for the initial and final target locations
         self.num_ref_points = num_intermediate_points + 2
         # Ref is a 2d arrays for the target
         # it contains the reference points (xyz) for the target at each timestep
 
-        self.ref = jnp.array(
-            [
-                init_target_location + ((final_target_location - init_target_location) * t / self.num_ref_points)
-                for t in range(self.num_ref_points)
-            ]
+        t = jnp.arange(self.num_ref_points)[:, None]
+        self.ref = (init_target_location + ((final_target_location - init_target_location) * t / self.num_ref_points)).astype(
+            dtype
         )
 
         self.size = size
+        # Bounds of the map, built once instead of at each trace of _sanitize_action
+        self._clip_low = jnp.array([-size, -size, 0], dtype=jnp.float32)
+        self._clip_high = jnp.array([size, size, 3], dtype=jnp.float32)
+
+        # Static (num_drones, num_drones - 1) indices of the other agents, row i contains every agent index but i
+        self._other_agents_idx = jnp.array(
+            [[other for other in range(self.num_drones) if other != agent] for agent in range(self.num_drones)],
+            dtype=jnp.int32,
+        ).reshape((self.num_drones, self.num_drones - 1))
 
     @override
     def observation_space(self, agent: int) -> Space:
@@ -80,6 +92,7 @@ class Escort(BaseParallelEnv):
             low=-self.size,
             high=3,
             shape=(3 * (self.num_drones + 1),),  # coordinates of the drones and the target
+            dtype=self.dtype,
         )
 
     @override
@@ -89,12 +102,15 @@ class Escort(BaseParallelEnv):
     @override
     @partial(jit, static_argnums=(0,))
     def _compute_obs(self, state: State) -> jnp.ndarray:
-        return jnp.append(
-            # each row contains the location of one agent and the location of the target
-            jnp.column_stack((state.agents_locations, jnp.tile(state.target_location, (self.num_drones, 1)))),
-            # then we add agents_locations to each row without the agent which is already in the row
-            # and make it only one dimension
-            jnp.array([jnp.delete(state.agents_locations, agent, axis=0).flatten() for agent in range(self.num_drones)]),
+        return jnp.concatenate(
+            [
+                # each row contains the location of one agent and the location of the target
+                state.agents_locations,
+                jnp.broadcast_to(state.target_location, (self.num_drones, state.target_location.shape[-1])),
+                # then we add agents_locations to each row without the agent which is already in the row
+                # and make it only one dimension
+                state.agents_locations[self._other_agents_idx].reshape((self.num_drones, -1)),
+            ],
             axis=1,
         )
 
@@ -106,12 +122,18 @@ class Escort(BaseParallelEnv):
         prev_target_locations = state.target_location
         return jdc.replace(
             state,
-            agents_locations=self._sanitize_action(state, actions),
-            target_location=jnp.array([not_finished * self.ref[state.timestep] + (1 - not_finished) * self.ref[-1]]),
+            agents_locations=self._sanitize_action(state, actions).astype(self.dtype),
+            target_location=jnp.where(not_finished, self.ref[state.timestep], self.ref[-1])[None, :],
             prev_agent_locations=prev_agent_locations,
             prev_target_locations=prev_target_locations,
         )
 
+    @override
+    @partial(jit, static_argnums=(0,))
+    def _sanitize_action(self, state: State, actions: jnp.ndarray) -> jnp.ndarray:
+        # Actions are clipped to stay in the map and scaled to do max 20cm in one step
+        return jnp.clip(state.agents_locations + actions * 0.2, self._clip_low, self._clip_high)
+
     @override
     @partial(jit, static_argnums=(0,))
     def _compute_reward(self, state: State, terminations: jnp.ndarray, truncations: jnp.ndarray) -> jnp.ndarray:
@@ -122,23 +144,15 @@ class Escort(BaseParallelEnv):
         # we have to negate the reward, -new_potential - (-old_potential) = old_potential - new_potential
         reward_close_to_target = old_dist - dist_from_old_target
 
-        reward_far_from_other_agents = jnp.array(
-            [
-                jnp.sum(jnp.linalg.norm(state.agents_locations[agent] - state.agents_locations, axis=1))
-                for agent in range(self.num_drones)
-            ]
-        ) / (self.num_drones - 1)
-        reward_crash = jnp.any(terminations) * -10 * jnp.ones(self.num_drones)
+        reward_far_from_other_agents = _pairwise_distances(state.agents_locations).sum(axis=1) / (self.num_drones - 1)
+        # the reward of every agent is -10 if any of them crashed
+        crashed = jnp.any(terminations)
 
         if self.multi_obj:
-            return (1 - jnp.any(terminations)) * jnp.column_stack(
-                (reward_close_to_target, reward_far_from_other_agents)
-            ) + jnp.any(terminations) * jnp.column_stack((reward_crash, reward_crash))
+            return jnp.where(crashed, -10.0, jnp.column_stack((reward_close_to_target, reward_far_from_other_agents)))
         else:
             # MO reward linearly combined using hardcoded weights
-            return (1 - jnp.any(terminations)) * (
-                0.995995 * reward_close_to_target + 0.004005 * reward_far_from_other_agents
-            ) + jnp.any(terminations) * reward_crash
+            return jnp.where(crashed, -10.0, 0.995995 * reward_close_to_target + 0.004005 * reward_far_from_other_agents)
 
     @override
     @partial(jit, static_argnums=(0,))
@@ -146,16 +160,14 @@ class Escort(BaseParallelEnv):
         # collision with the ground and the target
         terminated = jnp.logical_or(
             state.agents_locations[:, 2] < CLOSENESS_THRESHOLD,
-            jnp.linalg.norm(state.agents_locations - state.target_location) < CLOSENESS_THRESHOLD,
+            _distances_to_target(state.agents_locations, state.target_location) < CLOSENESS_THRESHOLD,
         )
 
-        for agent in range(self.num_drones):
-            distances = jnp.linalg.norm(state.agents_locations[agent] - state.agents_locations, axis=1)
-
-            # collision between two drones
-            terminated = terminated.at[agent].set(
-                jnp.logical_or(terminated[agent], jnp.any(jnp.logical_and(distances > 0.001, distances < CLOSENESS_THRESHOLD)))
-            )
+        # collision between two drones, row i of the distances matrix contains the distances from agent i to the others
+        distances = _pairwise_distances(state.agents_locations)
+        terminated = jnp.logical_or(
+            terminated, jnp.any(jnp.logical_and(distances > 0.001, distances < CLOSENESS_THRESHOLD), axis=1)
+        )
 
         return jnp.any(terminated) * jnp.ones(self.num_drones)
 
@@ -200,30 +212,39 @@ if __name__ == "__main__":
     )
 
     num_envs = 1000  # number of states in parallel
+    num_steps = 201  # number of steps played in each environment
     seed = 5  # test value
     key = random.PRNGKey(seed)
-    key, *subkeys = random.split(key, num_envs + 1)
 
     # Wrappers
     env = AutoReset(env)  # Auto reset the env when done, stores additional info in the dict
     env = VecEnv(env)  # vmaps the env public methods
 
-    obs, info, state = env.reset(jnp.stack(subkeys))
-
-    for i in range(201):
-        key, *subkeys = random.split(key, num_agents + 1)
-        actions = (
-            jnp.array([env.action_space(agent_id).sample(jnp.stack(subkeys[agent_id])) for agent_id in range(env.num_drones)])
-            .flatten()
-            .repeat(num_envs)
-            .reshape((num_envs, env.num_drones, -1))
-        )
-        global_state = env.state(state)
-        key, *subkeys = random.split(key, num_envs + 1)
-        obs, rewards, term, trunc, info, state = env.step(state, actions, jnp.stack(subkeys))
-
-        # print("obs", obs)
-        print("rewards", rewards)
-        # print("term", term)
-        print("trunc", trunc)
-        # print("info", info)
+    @jit
+    def play(key: jnp.ndarray) -> Tuple[State, jnp.ndarray]:
+        """Plays random actions in all the environments, returns the final states and the sum of the rewards."""
+        reset_key, actions_key, steps_key = random.split(key, 3)
+        obs, info, states = env.reset(random.split(reset_key, num_envs))
+
+        # all the keys of the loop are split at once instead of in each iteration
+        actions_keys = random.split(actions_key, num_steps)
+        steps_keys = random.split(steps_key, num_steps * num_envs).reshape((num_steps, num_envs, -1))
+
+        def body(i, carry):
+            # the states are a pytree, VecEnv vmaps the step directly over its leaves
+            states, rewards_sum = carry
+            actions = random.uniform(actions_keys[i], (num_envs, num_agents, 3), minval=-1, maxval=1)
+            obs, rewards, term, trunc, info, states = env.step(states, actions, steps_keys[i])
+            return states, rewards_sum + rewards
+
+        states, rewards_sum = jax.lax.fori_loop(0, num_steps, body, (states, jnp.zeros((num_envs, num_agents))))
+        return states, rewards_sum
+
+    start = time.time()
+    states, rewards_sum = jax.block_until_ready(play(key))
+    print(f"Played {num_envs * num_steps} steps in {time.time() - start:.2f}s (including compilation)")
+
+    start = time.time()
+    states, rewards_sum = jax.block_until_ready(play(random.PRNGKey(seed + 1)))
+    print(f"Played {num_envs * num_steps} steps in {time.time() - start:.2f}s")
+    print("sum of the rewards", rewards_sum)
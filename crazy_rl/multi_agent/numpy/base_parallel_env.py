@@ -2,7 +2,7 @@
 import functools
 import time
 from copy import copy
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Union
 from typing_extensions import override
 
 import numpy as np
@@ -57,6 +57,11 @@ def _distance_to_target(agent_location: npt.NDArray[float], target_location: npt
     return np.linalg.norm(agent_location - target_location)
 
 
+def _iter_locations(locations: Union[Dict[str, np.ndarray], np.ndarray]) -> Iterable[np.ndarray]:
+    """Iterates over the XYZ locations whether they are stored in a dict or in a (N, 3) array."""
+    return locations.values() if isinstance(locations, dict) else locations
+
+
 CLOSENESS_THRESHOLD = 0.2
 
 
@@ -100,9 +105,11 @@ class BaseParallelEnv(ParallelEnv):
             agents_names (list): list of agent names use as key for the dict
             drone_ids (list): ids of the drones (ignored in simulation mode)
             target_id (int, optional): ids of the targets (ignored in simulation mode). This is to control a real target with a real drone. Only supported in envs with one target.
-            init_flying_pos (Dict, optional): A dictionary containing the name of the agent as key and where each value
-                is a (3)-shaped array containing the initial XYZ position of the drones.
-            target_location (Dict, optional): A dictionary containing a (3)-shaped array for the XYZ position of the target.
+            init_flying_pos (Dict | ndarray, optional): A dictionary containing the name of the agent as key and where each value
+                is a (3)-shaped array containing the initial XYZ position of the drones. Can also be a (N, 3)-shaped
+                array whose rows are ordered as agents_names.
+            target_location (Dict | ndarray, optional): A dictionary containing a (3)-shaped array for the XYZ position of the
+                target. Can also be a (N, 3)-shaped array whose rows are ordered as agents_names.
             size (int, optional): Size of the area sides
             render_mode (str, optional): The mode to display the rendering of the environment. Can be real, human or None.
                 Real mode is used for real tests on the field, human mode is used to display the environment on a PyGame
@@ -117,6 +124,7 @@ class BaseParallelEnv(ParallelEnv):
         self._target_location = target_location
         self._previous_target = target_location.copy()
         self.possible_agents = agents_names.tolist()
+        self._agent_idx = {agent: i for i, agent in enumerate(self.possible_agents)}
         self.timestep = 0
         self.agents = []
 
@@ -194,8 +202,8 @@ class BaseParallelEnv(ParallelEnv):
             # dict target_position URI
             for id in self.drone_ids:
                 uri = "radio://0/4/2M/E7E7E7E7" + str(id).zfill(2)
-                next_loc = self._init_flying_pos["agent_" + str(id)]
-                current_loc = self._agent_location["agent_" + str(id)]
+                next_loc = self._get_location(self._init_flying_pos, "agent_" + str(id))
+                current_loc = self._get_location(self._agent_location, "agent_" + str(id))
                 command[uri] = [[current_loc, next_loc]]
 
             # Move target drone into position
@@ -238,8 +246,8 @@ class BaseParallelEnv(ParallelEnv):
             # dict target_position URI
             for id in self.drone_ids:
                 uri = "radio://0/4/2M/E7E7E7E7" + str(id).zfill(2)
-                target = new_locations["agent_" + str(id)]
-                current_location = self._agent_location["agent_" + str(id)]
+                target = self._get_location(new_locations, "agent_" + str(id))
+                current_location = self._get_location(self._agent_location, "agent_" + str(id))
                 command[uri] = [[current_location, target]]
 
             if self.target_id is not None:
@@ -327,7 +335,7 @@ class BaseParallelEnv(ParallelEnv):
 
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        for agent in self._agent_location.values():
+        for agent in _iter_locations(self._agent_location):
             glPushMatrix()
             point(np.array([agent[0], agent[1], agent[2]]))
 
@@ -337,7 +345,7 @@ class BaseParallelEnv(ParallelEnv):
         field(self.size)
         axes()
 
-        for target in self._target_location.values():
+        for target in _iter_locations(self._target_location):
             glPushMatrix()
             target_point(np.array([target[0], target[1], target[2]]))
             glPopMatrix()
@@ -369,6 +377,12 @@ class BaseParallelEnv(ParallelEnv):
     def action_space(self, agent):
         return self._action_space(agent)
 
+    def _get_location(self, locations: Union[Dict[str, np.ndarray], np.ndarray], agent: str) -> np.ndarray:
+        """Returns the XYZ location of an agent whether locations are stored in a dict or in a (N, 3) array."""
+        if isinstance(locations, dict):
+            return locations[agent]
+        return locations[self._agent_idx[agent]]
+
     def _get_drones_state(self):
         """Return the state of all drones (xyz position) inside a dict with the same keys of agent_location and target_location."""
         if self._mode == "simu":
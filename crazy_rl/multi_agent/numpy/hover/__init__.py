@@ -1,2 +1,3 @@
 """Hover environment for multi-agent reinforcement learning."""
 from crazy_rl.multi_agent.numpy.hover.hover import Hover
+from crazy_rl.multi_agent.numpy.hover.hover_vector_env import HoverVectorEnv
@@ -1,6 +1,6 @@
 """Hover environment for Crazyflies 2."""
 import time
-from typing import Dict
+from typing import Dict, Optional
 from typing_extensions import override
 
 import numpy as np
@@ -8,14 +8,22 @@ import numpy.typing as npt
 from gymnasium import spaces
 from pettingzoo.test.parallel_test import parallel_api_test
 
-from crazy_rl.multi_agent.numpy.base_parallel_env import (
-    BaseParallelEnv,
-    _distance_to_target,
-)
+from crazy_rl.multi_agent.numpy.base_parallel_env import BaseParallelEnv
+
+
+def _distances_to_target(agents_locations: np.ndarray, targets_locations: np.ndarray) -> np.ndarray:
+    diff = np.subtract(agents_locations, targets_locations)
+    # row-wise dot product, cheaper than dispatching np.linalg.norm on tiny vectors
+    return np.sqrt(np.einsum("...i,...i->...", diff, diff))
 
 
 class Hover(BaseParallelEnv):
-    """A Parallel Environment where drone learn how to hover around a target point."""
+    """A Parallel Environment where drone learn how to hover around a target point.
+
+    The observations returned by `reset()` and `step()` are views on a buffer reused by the environment: they are
+    overwritten by the next call to `step()` or `reset()`. Callers must `.copy()` the observations they keep across
+    steps, e.g. to store (obs, next_obs) pairs in a replay buffer.
+    """
 
     metadata = {"render_modes": ["human", "real"], "is_parallelizable": True, "render_fps": 20}
 
@@ -25,6 +33,7 @@ class Hover(BaseParallelEnv):
         init_flying_pos: npt.NDArray[int],
         render_mode=None,
         size: int = 2,
+        compute_info: Optional[bool] = None,
     ):
         """Hover environment for Crazyflies 2.
 
@@ -33,22 +42,44 @@ class Hover(BaseParallelEnv):
             init_flying_pos: Array of initial positions of the drones when they are flying
             render_mode: Render mode: "human", "real" or None
             size: Size of the map
+            compute_info: Whether to compute the distance to the target in the infos. Defaults to True when rendering
+                ("human" or "real" mode) and False otherwise, where empty infos are returned
+
+        Note:
+            The returned observations are reused buffers, overwritten on the next `step()` or `reset()`. Copy the
+            observations you keep across steps.
         """
         self.num_drones = len(drone_ids)
 
-        self._agent_location = dict()
-        self._target_location = dict()
-        self._init_flying_pos = dict()
         self._agents_names = np.array(["agent_" + str(i) for i in drone_ids])
         self.timestep = 0
+        self._compute_info_enabled = render_mode is not None if compute_info is None else compute_info
+        # The truncations are the same for all agents, both possible dicts are built once and shared (do not mutate them)
+        self._trunc_false = {agent: False for agent in self._agents_names}
+        self._trunc_true = {agent: True for agent in self._agents_names}
 
-        for i, agent in enumerate(self._agents_names):
-            self._init_flying_pos[agent] = init_flying_pos[i].copy()
-
+        # Locations are stored as (num_drones, 3) arrays whose rows are ordered as the agents names
+        self._init_flying_pos = np.array(init_flying_pos, dtype=np.float32)
         self._agent_location = self._init_flying_pos.copy()
         self._target_location = self._init_flying_pos.copy()
+        # Observations are written in place in this buffer, see _compute_obs
+        self._obs_buf = np.empty((self.num_drones, 6), dtype=np.float32)
 
         self.size = size
+        # Bounds of the map, drones are clipped to stay inside it
+        self._clip_low = np.array([-self.size, -self.size, 0], dtype=np.float32)
+        self._clip_high = np.array([self.size, self.size, 3], dtype=np.float32)
+
+        # Spaces do not depend on the agent, they are built once and shared by all agents
+        self._obs_space = spaces.Box(
+            low=np.array([-self.size, -self.size, 0, -self.size, -self.size, 0], dtype=np.float32),
+            high=np.array([self.size, self.size, 3, self.size, self.size, 3], dtype=np.float32),
+            shape=(6,),
+            dtype=np.float32,
+        )
+        self._act_space = spaces.Box(
+            low=-1 * np.ones(3, dtype=np.float32), high=np.ones(3, dtype=np.float32), dtype=np.float32
+        )
 
         super().__init__(
             render_mode=render_mode,
@@ -62,49 +93,39 @@ class Hover(BaseParallelEnv):
 
     @override
     def _observation_space(self, agent):
-        return spaces.Box(
-            low=np.array([-self.size, -self.size, 0, -self.size, -self.size, 0], dtype=np.float32),
-            high=np.array([self.size, self.size, 3, self.size, self.size, 3], dtype=np.float32),
-            shape=(6,),
-            dtype=np.float32,
-        )
+        return self._obs_space
 
     @override
     def _action_space(self, agent):
-        return spaces.Box(low=-1 * np.ones(3, dtype=np.float32), high=np.ones(3, dtype=np.float32), dtype=np.float32)
+        return self._act_space
+
+    def _stack(self, actions: Dict[str, np.ndarray]) -> np.ndarray:
+        """Stacks a dict of per-agent actions into a (num_drones, 3) array ordered as the agents names."""
+        return np.array([actions[agent] for agent in self._agents_names], dtype=np.float32)
 
     @override
     def _compute_obs(self):
-        obs = dict()
-        for agent in self._agents_names:
-            obs[agent] = np.hstack([self._agent_location[agent], self._target_location[agent]]).reshape(
-                6,
-            )
-        return obs
+        # each row contains the location of one agent and the location of its target
+        # (!) the observations are views on a buffer overwritten at each step, copy them to keep them across steps
+        self._obs_buf[:, :3] = self._agent_location
+        self._obs_buf[:, 3:] = self._target_location
+        return dict(zip(self._agents_names, self._obs_buf))
 
     @override
     def _transition_state(self, actions: Dict[str, np.ndarray]):
-        target_point_action = dict()
-        state = self._agent_location
-        for agent in self._agents_names:
-            target_point_action[agent] = np.clip(
-                state[agent] + actions[agent], [-self.size, -self.size, 0], [self.size, self.size, 3]
-            )
-        return target_point_action
+        new_locations = self._agent_location + self._stack(actions)
+        return np.clip(new_locations, self._clip_low, self._clip_high, out=new_locations)
 
     @override
     def _compute_reward(self):
         # Reward is based on the euclidean distance to the target point
-        reward = dict()
-        for i, agent in enumerate(self._agents_names):
-            # (!) targets and locations must be updated before this
-            dist_from_target = _distance_to_target(self._agent_location[agent], self._target_location[agent])
-            old_dist = _distance_to_target(self._previous_location[agent], self._target_location[agent])
+        # (!) targets and locations must be updated before this
+        dist_from_target = _distances_to_target(self._agent_location, self._target_location)
+        old_dist = _distances_to_target(self._previous_location, self._target_location)
 
-            # reward should be new_potential - old_potential but since the distances should be negated we reversed the signs
-            # -new_potential - (-old_potential) = old_potential - new_potential
-            reward[agent] = old_dist - dist_from_target
-        return reward
+        # reward should be new_potential - old_potential but since the distances should be negated we reversed the signs
+        # -new_potential - (-old_potential) = old_potential - new_potential
+        return dict(zip(self._agents_names, old_dist - dist_from_target))
 
     @override
     def _compute_terminated(self):
@@ -112,25 +133,31 @@ class Hover(BaseParallelEnv):
 
     @override
     def _compute_truncation(self):
-        if self.timestep == 200:
-            truncation = {agent: True for agent in self._agents_names}
-            self.agents = []
-            self.timestep = 0
-        else:
-            truncation = {agent: False for agent in self._agents_names}
+        if self.timestep != 200:
+            return self._trunc_false
 
-        return truncation
+        self.agents = []
+        self.timestep = 0
+        return self._trunc_true
 
     @override
     def _compute_info(self):
-        info = dict()
-        for agent in self._agents_names:
-            info[agent] = {"distance": np.linalg.norm(self._agent_location[agent] - self._target_location[agent], ord=1)}
-        return info
+        if not self._compute_info_enabled:
+            return {agent: {} for agent in self._agents_names}
+        # L1 distance of each agent to its target
+        distances = np.abs(self._target_location - self._agent_location).sum(axis=1)
+        return {agent: {"distance": distance} for agent, distance in zip(self._agents_names, distances.tolist())}
 
     @override
     def state(self):
-        return np.append(np.array(list(self._agent_location.values())).flatten(), self._target_location["unique"])
+        return np.append(self._agent_location.flatten(), self._target_location.flatten())
+
+    @override
+    def _get_drones_state(self):
+        target_loc, agent_locs = super()._get_drones_state()
+        if self._mode == "real":
+            agent_locs = np.array([agent_locs[agent] for agent in self._agents_names], dtype=np.float32)
+        return target_loc, agent_locs
 
 
 if __name__ == "__main__":
@@ -150,11 +177,12 @@ if __name__ == "__main__":
     )
 
     observations, infos = parallel_env.reset()
+    rng = np.random.default_rng()
 
     while parallel_env.agents:
-        actions = {
-            agent: parallel_env.action_space(agent).sample() for agent in parallel_env.agents
-        }  # this is where you would insert your policy
+        # this is where you would insert your policy, random actions for all the agents are drawn at once
+        actions_arr = rng.uniform(-1, 1, size=(len(parallel_env.agents), 3)).astype(np.float32)
+        actions = dict(zip(parallel_env.agents, actions_arr))
         observations, rewards, terminations, truncations, infos = parallel_env.step(actions)
         print("obs", observations, "reward", rewards)
         time.sleep(0.02)
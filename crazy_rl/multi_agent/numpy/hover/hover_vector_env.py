@@ -0,0 +1,111 @@
+"""Vectorized version of the Hover environment, simulating many independent swarms at once."""
+from typing import List, Optional, Union
+from typing_extensions import override
+
+import numpy as np
+import numpy.typing as npt
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv
+
+from crazy_rl.multi_agent.numpy.hover.hover import _distances_to_target
+
+
+class HoverVectorEnv(VectorEnv):
+    """Gymnasium VectorEnv running num_envs copies of the Hover environment in simulation.
+
+    Instead of one dict per agent and per environment, the state of all the environments is kept in
+    (num_envs, num_drones, 3) arrays, so one step of every environment is a handful of NumPy calls.
+    Observations are (num_envs, num_drones, 6)-shaped, actions (num_envs, num_drones, 3)-shaped, and rewards,
+    terminations and truncations (num_envs, num_drones)-shaped, rows following the order of init_flying_pos.
+    Sub-environments are automatically reset when truncated, the last observation and info (empty dict) being stored in
+    the infos under "final_observation" and "final_info", with their "_final_observation" and "_final_info" masks, as
+    in the Gymnasium vector environments.
+    """
+
+    def __init__(self, num_envs: int, init_flying_pos: npt.NDArray[int], size: int = 2):
+        """Vectorized Hover environment for Crazyflies 2.
+
+        Args:
+            num_envs: Number of environments simulated in parallel
+            init_flying_pos: Array of initial positions of the drones when they are flying
+            size: Size of the map
+        """
+        self.num_drones = len(init_flying_pos)
+        self.size = size
+        self._clip_low = np.array([-self.size, -self.size, 0], dtype=np.float32)
+        self._clip_high = np.array([self.size, self.size, 3], dtype=np.float32)
+
+        # each target is the initial position of its drone
+        self._init_flying_pos = np.broadcast_to(
+            np.asarray(init_flying_pos, dtype=np.float32), (num_envs, self.num_drones, 3)
+        ).copy()
+        self._agent_location = self._init_flying_pos.copy()
+        self._previous_location = self._init_flying_pos.copy()
+        self._target_location = self._init_flying_pos.copy()
+        self._timesteps = np.zeros(num_envs, dtype=np.int64)
+        self._actions = None
+
+        super().__init__(
+            num_envs=num_envs,
+            observation_space=spaces.Box(
+                low=np.tile(
+                    np.array([-self.size, -self.size, 0, -self.size, -self.size, 0], dtype=np.float32), (self.num_drones, 1)
+                ),
+                high=np.tile(
+                    np.array([self.size, self.size, 3, self.size, self.size, 3], dtype=np.float32), (self.num_drones, 1)
+                ),
+                dtype=np.float32,
+            ),
+            action_space=spaces.Box(low=-1, high=1, shape=(self.num_drones, 3), dtype=np.float32),
+        )
+
+    def _compute_obs(self) -> np.ndarray:
+        # each row contains the location of one agent and the location of its target
+        return np.concatenate([self._agent_location, self._target_location], axis=-1)
+
+    @override
+    def reset_wait(self, seed: Optional[Union[int, List[int]]] = None, options: Optional[dict] = None):
+        self._agent_location = self._init_flying_pos.copy()
+        self._previous_location = self._init_flying_pos.copy()
+        self._timesteps[:] = 0
+        return self._compute_obs(), {}
+
+    @override
+    def step_async(self, actions: np.ndarray):
+        self._actions = np.asarray(actions, dtype=np.float32).reshape((self.num_envs, self.num_drones, 3))
+
+    @override
+    def step_wait(self, **kwargs):
+        self._timesteps += 1
+
+        new_locations = self._agent_location + self._actions
+        self._previous_location = self._agent_location
+        self._agent_location = np.clip(new_locations, self._clip_low, self._clip_high, out=new_locations)
+
+        # potential based reward, see Hover._compute_reward
+        rewards = _distances_to_target(self._previous_location, self._target_location) - _distances_to_target(
+            self._agent_location, self._target_location
+        )
+        terminations = np.zeros((self.num_envs, self.num_drones), dtype=bool)
+        truncated = self._timesteps == 200
+        truncations = np.repeat(truncated[:, None], self.num_drones, axis=1)
+        observations = self._compute_obs()
+
+        infos = {}
+        if truncated.any():
+            final_observation = np.full(self.num_envs, None, dtype=object)
+            final_info = np.full(self.num_envs, None, dtype=object)
+            for env_id in np.flatnonzero(truncated):
+                final_observation[env_id] = observations[env_id].copy()
+                final_info[env_id] = {}
+            infos["final_observation"] = final_observation
+            infos["_final_observation"] = truncated.copy()
+            infos["final_info"] = final_info
+            infos["_final_info"] = truncated.copy()
+
+            self._agent_location[truncated] = self._init_flying_pos[truncated]
+            self._previous_location[truncated] = self._init_flying_pos[truncated]
+            self._timesteps[truncated] = 0
+            observations[truncated] = self._compute_obs()[truncated]
+
+        return observations, rewards, terminations, truncations, infos
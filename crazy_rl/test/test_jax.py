@@ -1,5 +1,6 @@
 import jax.numpy as jnp
 import jax.random as random
+import jax_dataclasses as jdc
 import numpy as np
 
 from crazy_rl.multi_agent.jax.catch.catch import Catch
@@ -238,6 +239,56 @@ def test_escort():
     assert (state.target_location == jnp.array([1, 1, 2.5]) + jnp.array([-3, -3, 0.5]) / 152).all()
 
 
+def test_escort_target_collision():
+    """Test that a single drone colliding with the target of the Escort environment ends the game."""
+    parallel_env = Escort(
+        num_drones=2,
+        init_flying_pos=jnp.array([[0, 0, 1], [0, 1, 1]]),
+        init_target_location=jnp.array([1, 1, 2.5]),
+        final_target_location=jnp.array([-2, -2, 3]),
+        num_intermediate_points=150,
+        size=3,
+    )
+
+    obs, info, state = parallel_env.reset(random.PRNGKey(5))
+
+    # only the first drone is on the target, the second one is far from it
+    state = jdc.replace(state, agents_locations=jnp.array([[1.0, 1.0, 2.45], [0.0, 1.0, 1.0]]))
+
+    assert parallel_env._compute_terminated(state).all()
+
+
+def test_escort_bfloat16():
+    """Test that the Escort environment can store its state in bfloat16 and still detects collisions."""
+    parallel_env = Escort(
+        num_drones=2,
+        init_flying_pos=jnp.array([[0, 0, 1], [0, 1, 1]]),
+        init_target_location=jnp.array([1, 1, 2.5]),
+        final_target_location=jnp.array([-2, -2, 3]),
+        num_intermediate_points=150,
+        size=3,
+        dtype=jnp.bfloat16,
+    )
+
+    key = random.PRNGKey(5)
+    obs, info, state = parallel_env.reset(key)
+
+    obs, rewards, terminated, truncated, info, state, key = move(
+        parallel_env, state, key, jnp.array([[0, 1, 0], [0, -1, 0]]), 2
+    )
+
+    assert not terminated.any()
+    assert state.agents_locations.dtype == jnp.bfloat16
+    assert obs.dtype == jnp.bfloat16
+    assert rewards.dtype == jnp.float32
+
+    obs, rewards, terminated, truncated, info, state, key = move(parallel_env, state, key, jnp.array([[0, 1, 0], [0, -1, 0]]))
+
+    # the drones crash
+    assert terminated.all()
+    assert (rewards == jnp.array([-10, -10])).all()
+
+
 def test_catch():
     """Test for the Catch environment in jax version."""
     parallel_env = Catch(
@@ -6,6 +6,7 @@ from crazy_rl.multi_agent.numpy.catch.catch import Catch
 from crazy_rl.multi_agent.numpy.circle.circle import Circle
 from crazy_rl.multi_agent.numpy.escort.escort import Escort
 from crazy_rl.multi_agent.numpy.hover.hover import Hover
+from crazy_rl.multi_agent.numpy.hover.hover_vector_env import HoverVectorEnv
 from crazy_rl.multi_agent.numpy.surround.surround import Surround
 
 
@@ -21,6 +22,83 @@ def test_hover():
     )
 
 
+def test_hover_info():
+    """Test that the distance in the infos of the hover environment is only computed when enabled."""
+    parallel_env = Hover(
+        drone_ids=np.array([0, 1]),
+        render_mode=None,
+        init_flying_pos=np.array([[0, 0, 1], [1, 1, 1]]),
+    )
+    observations, infos = parallel_env.reset()
+    assert infos == {"agent_0": {}, "agent_1": {}}
+
+    parallel_env = Hover(
+        drone_ids=np.array([0, 1]),
+        render_mode=None,
+        init_flying_pos=np.array([[0, 0, 1], [1, 1, 1]]),
+        compute_info=True,
+    )
+    observations, infos = parallel_env.reset()
+    observations, rewards, terminations, truncations, infos = parallel_env.step(
+        {"agent_0": np.array([1, 0, 0]), "agent_1": np.array([0, 0, -0.5])}
+    )
+    assert np.allclose([infos["agent_0"]["distance"], infos["agent_1"]["distance"]], [1, 0.5])
+
+
+def test_hover_obs_buffer():
+    """Test that the observations of the hover environment are views on a buffer overwritten at each step."""
+    parallel_env = Hover(
+        drone_ids=np.array([0, 1]),
+        render_mode=None,
+        init_flying_pos=np.array([[0, 0, 1], [1, 1, 1]]),
+    )
+    obs, infos = parallel_env.reset()
+    kept_obs = obs["agent_0"].copy()
+    assert np.allclose(kept_obs, [0, 0, 1, 0, 0, 1])
+
+    next_obs, rewards, terminations, truncations, infos = parallel_env.step(
+        {"agent_0": np.array([1, 0, 0]), "agent_1": np.array([0, 0, 0])}
+    )
+
+    # the observation returned by reset is overwritten, the copy is not
+    assert np.shares_memory(obs["agent_0"], next_obs["agent_0"])
+    assert np.allclose(obs["agent_0"], [1, 0, 1, 0, 0, 1])
+    assert np.allclose(kept_obs, [0, 0, 1, 0, 0, 1])
+
+
+def test_hover_vector_env():
+    """Test that the vectorized hover environment matches independent copies of the hover environment."""
+    num_envs = 3
+    init_flying_pos = np.array([[0, 0, 1], [1, 1, 1]])
+    vec_env = HoverVectorEnv(num_envs=num_envs, init_flying_pos=init_flying_pos)
+    envs = [Hover(drone_ids=np.array([0, 1]), render_mode=None, init_flying_pos=init_flying_pos) for _ in range(num_envs)]
+
+    vec_obs, vec_infos = vec_env.reset(seed=42)
+    for i, env in enumerate(envs):
+        obs, infos = env.reset(seed=42)
+        assert np.allclose(vec_obs[i], np.array([obs["agent_0"], obs["agent_1"]]))
+
+    rng = np.random.default_rng(42)
+    for _ in range(200):
+        actions = rng.uniform(-1, 1, size=vec_env.action_space.shape).astype(np.float32)
+        vec_obs, vec_rewards, vec_terminations, vec_truncations, vec_infos = vec_env.step(actions)
+        for i, env in enumerate(envs):
+            obs, rewards, terminations, truncations, infos = env.step({"agent_0": actions[i, 0], "agent_1": actions[i, 1]})
+            assert np.allclose(vec_rewards[i], [rewards["agent_0"], rewards["agent_1"]])
+            assert (vec_truncations[i] == [truncations["agent_0"], truncations["agent_1"]]).all()
+            assert not vec_terminations[i].any()
+            if vec_truncations[i].all():
+                assert np.allclose(vec_infos["final_observation"][i], np.array([obs["agent_0"], obs["agent_1"]]))
+                assert vec_infos["_final_observation"][i] and vec_infos["_final_info"][i]
+                assert vec_infos["final_info"][i] == {}
+            else:
+                assert np.allclose(vec_obs[i], np.array([obs["agent_0"], obs["agent_1"]]))
+
+    # sub-environments are reset after being truncated
+    assert vec_truncations.all()
+    assert np.allclose(vec_obs, np.concatenate([init_flying_pos, init_flying_pos], axis=1))
+
+
 def test_circle():
     """Test for the circle environment."""
     parallel_api_test(
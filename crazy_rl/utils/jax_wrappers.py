@@ -68,10 +68,10 @@ class LogWrapper(Wrapper):
         new_episode_length = state.episode_lengths + 1
         state = LogEnvState(
             env_state=env_state,
-            episode_returns=new_episode_return * (1 - done),
-            episode_lengths=new_episode_length * (1 - done),
-            returned_episode_returns=state.returned_episode_returns * (1 - done) + new_episode_return * done,
-            returned_episode_lengths=state.returned_episode_lengths * (1 - done) + new_episode_length * done,
+            episode_returns=jnp.where(done, 0, new_episode_return),
+            episode_lengths=jnp.where(done, 0, new_episode_length),
+            returned_episode_returns=jnp.where(done, new_episode_return, state.returned_episode_returns),
+            returned_episode_lengths=jnp.where(done, new_episode_length, state.returned_episode_lengths),
             timestep=state.timestep + 1,
             total_timestep=state.total_timestep + 1,
         )